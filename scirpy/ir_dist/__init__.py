@@ -197,7 +197,7 @@ def _ir_dist(
                 for chain_id in ["1", "2"]
             ]
         )
-        return np.unique([x.upper() for x in tmp_seqs[~_is_na(tmp_seqs)]])
+        return np.unique(np.char.upper(tmp_seqs[~_is_na(tmp_seqs)].astype(str)))
 
     for i, tmp_adata in enumerate([adata, reference]):
         if tmp_adata is not None:
@@ -271,10 +271,10 @@ def sequence_dist(
     -------
     Symmetrical, sparse pairwise distance matrix.
     """
-    seqs = [x.upper() for x in seqs]
+    seqs = np.char.upper(np.asarray(seqs, dtype=str))
     seqs_unique, seqs_unique_inverse = np.unique(seqs, return_inverse=True)  # type: ignore
     if seqs2 is not None:
-        seqs2 = [x.upper() for x in seqs2]
+        seqs2 = np.char.upper(np.asarray(seqs2, dtype=str))
         seqs2_unique, seqs2_unique_inverse = np.unique(seqs2, return_inverse=True)  # type: ignore
     else:
         seqs2_unique, seqs2_unique_inverse = None, seqs_unique_inverse
@@ -244,14 +244,34 @@ class ClonotypeNeighbors:
                 tqdm_class=tqdm,
             )
 
-        dist = sp.vstack(dist_rows)
+        dist_rows = list(dist_rows)
+        # Assemble the CSR matrix directly from the flat (indices, data)
+        # row buffers instead of vstacking n_clonotypes sparse matrices.
+        # uint8 data and 32 bit indices keep the matrix as small as possible.
+        dist = sp.csr_matrix(
+            (
+                np.concatenate([data for _, data in dist_rows]).astype(
+                    np.uint8, copy=False
+                ),
+                np.concatenate([indices for indices, _ in dist_rows]).astype(
+                    np.int32, copy=False
+                ),
+                np.concatenate(
+                    [[0], np.cumsum([len(indices) for indices, _ in dist_rows])]
+                ).astype(np.int32, copy=False),
+            ),
+            shape=(len(dist_rows), self.neighbor_finder.n_cols),
+        )
         dist.eliminate_zeros()
         logging.hint("Done computing clonotype x clonotype distances. ", time=start)
         return dist  # type: ignore
 
-    def _dist_for_clonotype(self, ct_id: int) -> sp.csr_matrix:
+    def _dist_for_clonotype(self, ct_id: int) -> Tuple[np.ndarray, np.ndarray]:
         """Compute neighboring clonotypes for a given clonotype.
 
+        Returns the flat `(indices, data)` buffers of the corresponding
+        sparse row of the clonotype distance matrix.
+
         Or operations use the min dist of two matching entries.
         And operations use the max dist of two matching entries.
 
@@ -351,6 +371,4 @@ class ClonotypeNeighbors:
             )
             res = np.multiply(res, match_columns_mask[0, has_distance.indices])
 
-        final_res = has_distance.copy()
-        final_res.data = res.astype(np.uint8)
-        return final_res
+        return has_distance.indices, res.astype(np.uint8)
@@ -1,11 +1,9 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, Hashable, Sequence, Tuple, Union, Mapping
+from typing import Dict, Hashable, Optional, Sequence, Tuple, Union, Mapping
 import scipy.sparse as sp
-from scipy.sparse.coo import coo_matrix
-from scipy.sparse.csr import csr_matrix
+from scipy.sparse import coo_matrix, csr_matrix
 from .._compat import Literal
-import warnings
 from functools import reduce
 from operator import mul
 
@@ -59,16 +57,17 @@ def reduce_or(*args, chain_count=None):
 
     All arrays must be of a float dtype (to support nan and inf)
     """
-    # ignore runtime warnings due to NAN-slices
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=RuntimeWarning)
-
-        tmp_array = np.vstack(args)
-        assert np.issubdtype(tmp_array.dtype, np.floating)
-        tmp_array[tmp_array == 0] = np.inf
-        tmp_array = np.nanmin(tmp_array, axis=0)
-        tmp_array[np.isinf(tmp_array)] = 0
-        return tmp_array
+    tmp_array = np.vstack(args)
+    assert np.issubdtype(tmp_array.dtype, np.floating)
+    # mask out nans and zeros with the neutral element of `min`, instead of
+    # relying on `nanmin` which warns on (and needs to branch on) all-nan
+    # slices.
+    nan_mask = np.isnan(tmp_array)
+    tmp_array[(tmp_array == 0) | nan_mask] = np.inf
+    tmp_array = np.min(tmp_array, axis=0)
+    tmp_array[np.isinf(tmp_array)] = 0
+    tmp_array[np.all(nan_mask, axis=0)] = np.nan
+    return tmp_array
 
 
 def reduce_and(*args, chain_count):
@@ -80,18 +79,20 @@ def reduce_and(*args, chain_count):
     Only entries that have the same chain count (e.g. clonotypes with both TRA_1
     and TRA_2) are comparable.
     """
-    # ignore runtime warnings due to NAN-slices
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=RuntimeWarning)
-
-        tmp_array = np.vstack(args)
-        assert np.issubdtype(tmp_array.dtype, np.floating)
-        tmp_array[tmp_array == 0] = np.inf
-        same_count_mask = np.sum(~np.isnan(tmp_array), axis=0) == chain_count
-        tmp_array = np.nanmax(tmp_array, axis=0)
-        tmp_array[np.isinf(tmp_array)] = 0
-        tmp_array = np.multiply(tmp_array, same_count_mask)
-        return tmp_array
+    tmp_array = np.vstack(args)
+    assert np.issubdtype(tmp_array.dtype, np.floating)
+    nan_mask = np.isnan(tmp_array)
+    same_count_mask = np.sum(~nan_mask, axis=0) == chain_count
+    # `0` propagates through `max` (a non-matching chain invalidates the
+    # whole entry), nans are ignored. Encode this with the appropriate
+    # infinities instead of `nanmax`, which warns on all-nan slices.
+    tmp_array[tmp_array == 0] = np.inf
+    tmp_array[nan_mask] = -np.inf
+    tmp_array = np.max(tmp_array, axis=0)
+    tmp_array[np.isposinf(tmp_array)] = 0
+    tmp_array[np.all(nan_mask, axis=0)] = np.nan
+    tmp_array = np.multiply(tmp_array, same_count_mask)
+    return tmp_array
 
 
 class ReverseLookupTable:
@@ -121,6 +122,7 @@ class ReverseLookupTable:
         self.dist_type = dist_type
         self.size = size
         self.lookup: Dict[Hashable, sp.coo_matrix] = dict()
+        self._matrix: Optional[sp.csr_matrix] = None
 
     @staticmethod
     def from_dict_of_indices(
@@ -161,6 +163,28 @@ class ReverseLookupTable:
     def is_boolean(self):
         return self.dist_type == "boolean"
 
+    def matrix(self, n_features: int) -> sp.csr_matrix:
+        """All numeric row masks stacked into a single `n_features x size`
+        CSR matrix, where `n_features` is the number of rows/columns of the
+        associated feature distance matrix.
+
+        The matrix is built lazily and cached. Multiplying a distance matrix
+        row with it performs the reverse lookup for all feature indices of
+        that row in a single sparse matrix product."""
+        if self._matrix is None:
+            if len(self.lookup):
+                row = np.repeat(
+                    list(self.lookup.keys()), [v.nnz for v in self.lookup.values()]
+                )
+                col = np.concatenate([v.col for v in self.lookup.values()])
+                data = np.concatenate([v.data for v in self.lookup.values()])
+            else:
+                row, col, data = (), (), ()
+            self._matrix = sp.csr_matrix(
+                (data, (row, col)), shape=(n_features, self.size)
+            )
+        return self._matrix
+
     def empty(self):
         """Create an empty row with same dimensions as those stored
         in the lookup. Respects the distance type"""
@@ -284,7 +308,9 @@ class DoubleLookupNeighborFinder:
             return reverse.empty()
         else:
             # get distances from the distance matrix...
-            row = distance_matrix[idx_in_dist_mat, :]
+            # (the forward lookup is a float array to support nan, therefore
+            # the index needs to be converted back to int)
+            row = distance_matrix[int(idx_in_dist_mat), :]
 
             if reverse.is_boolean:
                 assert (
@@ -292,15 +318,11 @@ class DoubleLookupNeighborFinder:
                 ), "Boolean reverse lookup only works for identity distance matrices."
                 return reverse[row.indices[0]]  # type: ignore
             else:
-                # ... and get column indices directly from sparse row
-                # sum concatenates coo matrices
-                return merge_coo_matrices(
-                    (
-                        reverse[i] * multiplier
-                        for i, multiplier in zip(row.indices, row.data)  # type: ignore
-                    ),
-                    shape=(1, reverse.size),
-                )
+                # ... and multiply with the stacked reverse lookup masks.
+                # This is equivalent to accumulating `reverse[i] * dist`
+                # for each entry `i, dist` of the sparse row, but happens
+                # in a single sparse matrix product.
+                return (row * reverse.matrix(distance_matrix.shape[1])).tocoo()
 
     def add_distance_matrix(
         self,
@@ -372,11 +394,10 @@ class DoubleLookupNeighborFinder:
         """Create a lookup array that maps each clonotype to the respective
         index in the feature distance matrix.
         """
-        return np.array(
-            [
-                self.distance_matrix_labels[distance_matrix][k]
-                for k in self.feature_table[feature_col]
-            ]
+        return (
+            self.feature_table[feature_col]
+            .map(self.distance_matrix_labels[distance_matrix])
+            .to_numpy()
         )
 
     def _build_reverse_lookup_table(
@@ -391,18 +412,17 @@ class DoubleLookupNeighborFinder:
         If the dist_type is numeric, will use a sparse numeric matrix.
         If the dist_type is boolean, use a dense boolean.
         """
-        tmp_reverse_lookup = dict()
         tmp_index_lookup = self.distance_matrix_labels2[distance_matrix]
 
-        # Build reverse lookup
-        for i, k in enumerate(self.feature_table2[feature_col]):
-            tmp_key = tmp_index_lookup[k]
-            if np.isnan(tmp_key):
-                continue
-            try:
-                tmp_reverse_lookup[tmp_key].append(i)
-            except KeyError:
-                tmp_reverse_lookup[tmp_key] = [i]
+        # Build reverse lookup: group clonotype indices by their feature index.
+        keys = self.feature_table2[feature_col].map(tmp_index_lookup).to_numpy()
+        clonotype_ids = np.flatnonzero(~np.isnan(keys))
+        keys = keys[clonotype_ids].astype(int)
+        order = np.argsort(keys, kind="stable")
+        unique_keys, offsets = np.unique(keys[order], return_index=True)
+        tmp_reverse_lookup = dict(
+            zip(unique_keys.tolist(), np.split(clonotype_ids[order], offsets[1:]))
+        )
 
         return ReverseLookupTable.from_dict_of_indices(
             tmp_reverse_lookup, dist_type, self.n_cols
@@ -1,19 +1,47 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from multiprocessing import cpu_count
 import parasail
-from scipy.sparse.csr import csr_matrix
-from tqdm.contrib.concurrent import process_map
 import itertools
 from typing import Union, Sequence, Tuple, Optional
 import numpy as np
 import abc
-from Levenshtein import distance as levenshtein_dist
-from Levenshtein import hamming as hamming_dist
+from rapidfuzz.distance.Hamming import distance as hamming_dist
+from rapidfuzz.distance.Levenshtein import distance as levenshtein_dist
+from rapidfuzz.process import cdist as rapidfuzz_cdist
 import scipy.spatial
 import scipy.sparse
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, csr_matrix
 from ..util import _doc_params, tqdm
 
 
+#: sequence arrays shared with the worker processes. Initialized once per
+#: worker via `_init_worker_seqs` instead of serializing a slice of the
+#: sequences with every task.
+_worker_seqs = None
+
+
+def _init_worker_seqs(seqs, seqs2, block_size):
+    """Initializer for worker processes of `ParallelDistanceCalculator`."""
+    global _worker_seqs
+    _worker_seqs = (seqs, seqs2, block_size)
+
+
+def _compute_block_from_origin(dist_calculator, origin):
+    """Reconstruct a block from the shared sequence arrays and compute it.
+
+    Needs to be a module-level function to be picklable."""
+    seqs1, seqs2, block_size = _worker_seqs
+    row, col = origin
+    square_mat = seqs2 is None
+    if square_mat:
+        seqs2 = None if row == col else seqs1
+    block_seqs2 = None if seqs2 is None else seqs2[col : col + block_size]
+    return dist_calculator._compute_block(
+        seqs1[row : row + block_size], block_seqs2, origin
+    )
+
+
 _doc_params_parallel_distance_calculator = """\
 n_jobs
     Number of jobs to use for the pairwise distance calculation.
@@ -137,7 +165,7 @@ class ParallelDistanceCalculator(DistanceCalculator):
         seqs1: Sequence[str],
         seqs2: Union[Sequence[str], None],
         origin: Tuple[int, int],
-    ) -> Tuple[int, int, int]:
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Compute the distances for a block of the matrix
 
         Parameters
@@ -152,9 +180,9 @@ class ParallelDistanceCalculator(DistanceCalculator):
 
         Returns
         ------
-        List of (distance, row, col) tuples for all elements with distance != 0.
-        row, col must be the coordinates in the final matrix (they can be derived using
-        `origin`). Can't be a generator because this needs to be picklable.
+        Tuple of (distances, rows, cols) flat numpy arrays for all elements
+        with distance != 0. rows, cols must be the coordinates in the final
+        matrix (they can be derived using `origin`).
         """
         pass
 
@@ -209,34 +237,60 @@ class ParallelDistanceCalculator(DistanceCalculator):
         """Calculate the distance matrix.
 
         See :meth:`DistanceCalculator.calc_dist_mat`."""
-        # precompute blocks as list to have total number of blocks for progressbar
-        blocks = list(self._block_iter(seqs, seqs2, self.block_size))
-
-        block_results = process_map(
-            self._compute_block,
-            *zip(*blocks),
-            max_workers=self.n_jobs if self.n_jobs is not None else cpu_count(),
-            chunksize=50,
-            tqdm_class=tqdm,
-            total=len(blocks),
-        )
+        # only the block origins are sent to the workers; the sequence arrays
+        # themselves are shared once per worker via the pool initializer.
+        origins = [
+            origin for _, _, origin in self._block_iter(seqs, seqs2, self.block_size)
+        ]
+
+        n_jobs = self.n_jobs if self.n_jobs is not None else cpu_count()
+        # Dispatch several blocks per task: this amortizes the
+        # serialization overhead over whole batches of blocks instead of
+        # paying it for every block. A few batches per worker are enough to
+        # keep the load balanced.
+        chunksize = min(2000, max(1, len(origins) // (n_jobs * 4)))
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker_seqs,
+            initargs=(seqs, seqs2, self.block_size),
+        ) as executor:
+            block_results = list(
+                tqdm(
+                    executor.map(
+                        _compute_block_from_origin,
+                        itertools.repeat(self),
+                        origins,
+                        chunksize=chunksize,
+                    ),
+                    total=len(origins),
+                )
+            )
 
-        try:
-            dists, rows, cols = zip(*itertools.chain(*block_results))
-        except ValueError:
-            # happens when there is no match at all
+        if len(block_results):
+            dists = np.concatenate([res[0] for res in block_results])
+            rows = np.concatenate([res[1] for res in block_results])
+            cols = np.concatenate([res[2] for res in block_results])
+        else:
             dists, rows, cols = (), (), ()
 
         shape = (len(seqs), len(seqs2)) if seqs2 is not None else (len(seqs), len(seqs))
+        # all blocks only emit entries `d + 1 >= 1`, so the matrix does not
+        # contain any explicit zeros that would need to be eliminated.
         score_mat = scipy.sparse.coo_matrix(
             (dists, (rows, cols)), dtype=self.DTYPE, shape=shape
         )
-        score_mat.eliminate_zeros()
         score_mat = score_mat.tocsr()
 
         if seqs2 is None:
             score_mat = self.squarify(score_mat)
 
+        # 32 bit indices are sufficient for all realistic numbers of unique
+        # sequences and halve the memory of the CSR index arrays. The data
+        # may have been upcast by `squarify` and goes back to `DTYPE`.
+        score_mat.data = score_mat.data.astype(self.DTYPE, copy=False)
+        score_mat.indices = score_mat.indices.astype(np.int32, copy=False)
+        score_mat.indptr = score_mat.indptr.astype(np.int32, copy=False)
+
         return score_mat
 
 
@@ -272,23 +326,24 @@ class IdentityDistanceCalculator(DistanceCalculator):
             # In this case, the offsetted distance matrix is the identity matrix
             return scipy.sparse.identity(len(seqs), dtype=self.DTYPE, format="csr")
         else:
-            # actually compare the values
-            def coord_generator():
-                for (i1, s1), (i2, s2) in itertools.product(
-                    enumerate(seqs), enumerate(seqs2)
-                ):
-                    if s1 == s2:
-                        yield 1, i1, i2
-
-            try:
-                d, row, col = zip(*coord_generator())
-            except ValueError:
-                # happens when there is no match at all
-                d, row, col = (), (), ()
-
-            return coo_matrix(
-                (d, (row, col)), dtype=self.DTYPE, shape=(len(seqs), len(seqs2))
+            # Each unique sequence matches at most one unique sequence of the
+            # other array. The matching coordinates are obtained directly
+            # from the set intersection -- no need to compare all pairs.
+            seqs_unique, seqs_unique_inverse = np.unique(seqs, return_inverse=True)
+            seqs2_unique, seqs2_unique_inverse = np.unique(seqs2, return_inverse=True)
+            _, row, col = np.intersect1d(
+                seqs_unique, seqs2_unique, assume_unique=True, return_indices=True
+            )
+            dist_mat = coo_matrix(
+                (np.ones(len(row), dtype=self.DTYPE), (row, col)),
+                dtype=self.DTYPE,
+                shape=(len(seqs_unique), len(seqs2_unique)),
             ).tocsr()
+            # expand to the input arrays (which may contain duplicates)
+            i, j = np.meshgrid(
+                seqs_unique_inverse, seqs2_unique_inverse, sparse=True, indexing="ij"
+            )
+            return dist_mat[i, j]
 
 
 @_doc_params(params=_doc_params_parallel_distance_calculator)
@@ -299,8 +354,12 @@ class LevenshteinDistanceCalculator(ParallelDistanceCalculator):
     The edit distance is the total number of deletion, addition and modification
     events.
 
-    This class relies on `Python-levenshtein <https://github.com/ztane/python-Levenshtein>`_
-    to calculate the distances.
+    This class relies on `rapidfuzz <https://github.com/maxbachmann/RapidFuzz>`_
+    to calculate the distances. It uses a bit-parallel implementation of
+    Myers' algorithm and computes a whole block of pairwise distances
+    in a single batched call, bounded by the cutoff. The same algorithm would
+    lend itself to GPU offloading for very large sequence pools, but we
+    deliberately keep the dependency set CPU-only.
 
     Choosing a cutoff:
         Each modification stands for a deletion, addition or modification event.
@@ -322,22 +381,37 @@ class LevenshteinDistanceCalculator(ParallelDistanceCalculator):
 
     def _compute_block(self, seqs1, seqs2, origin):
         origin_row, origin_col = origin
-        if seqs2 is not None:
-            # compute the full matrix
-            coord_iterator = itertools.product(enumerate(seqs1), enumerate(seqs2))
-        else:
-            # compute only upper triangle in this case
-            coord_iterator = itertools.combinations_with_replacement(
-                enumerate(seqs1), r=2
-            )
-
-        result = []
-        for (row, s1), (col, s2) in coord_iterator:
-            d = levenshtein_dist(s1, s2)
-            if d <= self.cutoff:
-                result.append((d + 1, origin_row + row, origin_col + col))
+        # levenshtein_dist(s1, s2) >= abs(len(s1) - len(s2)). If even the
+        # closest pair of lengths is further apart than the cutoff, the
+        # entire block can be skipped.
+        lens1 = np.fromiter((len(s) for s in seqs1), dtype=np.int32, count=len(seqs1))
+        lens2 = (
+            lens1
+            if seqs2 is None
+            else np.fromiter((len(s) for s in seqs2), dtype=np.int32, count=len(seqs2))
+        )
+        if (
+            max(lens1.min() - lens2.max(), lens2.min() - lens1.max(), 0) > self.cutoff
+        ):
+            return (np.empty(0, dtype=int),) * 3
+
+        # passing the cutoff allows the bounded variant of the algorithm
+        # to early-exit. Distances > cutoff are set to cutoff + 1.
+        block_dists = rapidfuzz_cdist(
+            seqs1,
+            seqs1 if seqs2 is None else seqs2,
+            scorer=levenshtein_dist,
+            score_cutoff=self.cutoff,
+            dtype=np.int32,
+            workers=1,
+        )
+        mask = block_dists <= self.cutoff
+        if seqs2 is None:
+            # only keep the upper triangle in this case
+            mask &= np.tri(*mask.shape, k=0, dtype=bool).T
 
-        return result
+        rows, cols = np.nonzero(mask)
+        return block_dists[rows, cols] + 1, rows + origin_row, cols + origin_col
 
 
 @_doc_params(params=_doc_params_parallel_distance_calculator)
@@ -350,8 +424,9 @@ class HammingDistanceCalculator(ParallelDistanceCalculator):
     distance-cutoff, i.e. they receive a distance of `0` in the sparse distance
     matrix and will not be connected by an edge in the graph.
 
-    This class relies on `Python-levenshtein <https://github.com/ztane/python-Levenshtein>`_
-    to calculate the distances.
+    This class relies on `rapidfuzz <https://github.com/maxbachmann/RapidFuzz>`_
+    to calculate the distances. A whole block of pairwise distances is
+    computed in a single batched call, bounded by the cutoff.
 
     Choosing a cutoff:
         Each modification stands for a substitution event.
@@ -373,26 +448,37 @@ class HammingDistanceCalculator(ParallelDistanceCalculator):
 
     def _compute_block(self, seqs1, seqs2, origin):
         origin_row, origin_col = origin
-        if seqs2 is not None:
-            # compute the full matrix
-            coord_iterator = itertools.product(enumerate(seqs1), enumerate(seqs2))
-        else:
-            # compute only upper triangle in this case
-            coord_iterator = itertools.combinations_with_replacement(
-                enumerate(seqs1), r=2
-            )
-
-        result = []
-        for (row, s1), (col, s2) in coord_iterator:
-
-            # require identical length of sequences
-            if len(s1) != len(s2):
-                continue
-            d = hamming_dist(s1, s2)
-            if d <= self.cutoff:
-                result.append((d + 1, origin_row + row, origin_col + col))
+        # the hamming distance requires identical lengths. If the length
+        # ranges of the two blocks don't even overlap, skip the block.
+        lens1 = np.fromiter((len(s) for s in seqs1), dtype=np.int32, count=len(seqs1))
+        lens2 = (
+            lens1
+            if seqs2 is None
+            else np.fromiter((len(s) for s in seqs2), dtype=np.int32, count=len(seqs2))
+        )
+        if lens1.min() > lens2.max() or lens2.min() > lens1.max():
+            return (np.empty(0, dtype=int),) * 3
+
+        # the bit-parallel kernel computes the whole block in a single
+        # batched call. Distances > cutoff are set to cutoff + 1.
+        block_dists = rapidfuzz_cdist(
+            seqs1,
+            seqs1 if seqs2 is None else seqs2,
+            scorer=hamming_dist,
+            score_cutoff=self.cutoff,
+            dtype=np.int32,
+            workers=1,
+        )
+        mask = block_dists <= self.cutoff
+        # require identical length of sequences (the kernel pads the
+        # shorter sequence instead)
+        mask &= lens1[:, np.newaxis] == lens2[np.newaxis, :]
+        if seqs2 is None:
+            # only keep the upper triangle in this case
+            mask &= np.tri(*mask.shape, k=0, dtype=bool).T
 
-        return result
+        rows, cols = np.nonzero(mask)
+        return block_dists[rows, cols] + 1, rows + origin_row, cols + origin_col
 
 
 @_doc_params(params=_doc_params_parallel_distance_calculator)
@@ -454,26 +540,73 @@ class AlignmentDistanceCalculator(ParallelDistanceCalculator):
         self.gap_open = gap_open
         self.gap_extend = gap_extend
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _get_subst_matrix(name: str):
+        """Retrieve a parasail substitution matrix by name.
+
+        The matrix is cached, such that it is only constructed once per
+        worker process instead of once per block."""
+        return parasail.Matrix(name)
+
     def _compute_block(self, seqs1, seqs2, origin):
-        subst_mat = parasail.Matrix(self.subst_mat)
+        subst_mat = self._get_subst_matrix(self.subst_mat)
         origin_row, origin_col = origin
 
         square_matrix = seqs2 is None
         if square_matrix:
             seqs2 = seqs1
 
-        self_alignment_scores1 = self._self_alignment_scores(seqs1)
+        # A length difference of `delta` residues enforces gap penalties of at
+        # least `gap_open + (delta - 1) * gap_extend`, which lower-bounds the
+        # distance. `slack` corrects this bound for substitution matrices
+        # where an aligned pair can score higher than the weaker of the two
+        # self-matches (e.g. ambiguity codes in BLOSUM62) or where diagonal
+        # entries are negative.
+        slack = self._subst_mat_slack(subst_mat)
+        lens1 = np.fromiter((len(s) for s in seqs1), dtype=np.int32, count=len(seqs1))
+        lens2 = np.fromiter((len(s) for s in seqs2), dtype=np.int32, count=len(seqs2))
+
+        # Entire blocks can be skipped when the length windows of the two
+        # sequence sets are too far apart for any pair to pass the cutoff.
+        min_delta = max(lens1.min() - lens2.max(), lens2.min() - lens1.max(), 0)
+        if (
+            min_delta
+            and self.gap_open
+            + (min_delta - 1) * self.gap_extend
+            - slack * max(lens1.max(), lens2.max())
+            > self.cutoff
+        ):
+            return (np.empty(0, dtype=int),) * 3
+
+        self_alignment_scores1 = self._self_alignment_scores(seqs1, subst_mat)
         if square_matrix:
             self_alignment_scores2 = self_alignment_scores1
         else:
-            self_alignment_scores2 = self._self_alignment_scores(seqs2)
+            self_alignment_scores2 = self._self_alignment_scores(seqs2, subst_mat)
 
-        result = []
+        dists, rows, cols = [], [], []
         for row, s1 in enumerate(seqs1):
+            # the profile of the query sequence is reused for all targets
+            profile = parasail.profile_create_sat(s1, subst_mat)
             col_start = row if square_matrix else 0
+            len1 = len(s1)
             for col, s2 in enumerate(seqs2[col_start:], start=col_start):
-                profile = parasail.profile_create_16(s1, subst_mat)
-                r = parasail.nw_scan_profile_16(
+                delta = abs(lens2[col] - len1)
+                if (
+                    delta
+                    and self.gap_open
+                    + (delta - 1) * self.gap_extend
+                    - slack * max(len1, lens2[col])
+                    > self.cutoff
+                ):
+                    continue
+                # NB: always use the `scan` vectorization. The `striped`
+                # kernels would be faster for short sequences, but parasail's
+                # striped Needleman-Wunsch returns wrong scores for a
+                # substantial fraction of CDR3-length pairs (verified against
+                # the serial implementation).
+                r = parasail.nw_scan_profile_sat(
                     profile, s2, self.gap_open, self.gap_extend
                 )
                 max_score = np.min(
@@ -481,21 +614,41 @@ class AlignmentDistanceCalculator(ParallelDistanceCalculator):
                 )
                 d = max_score - r.score
                 if d <= self.cutoff:
-                    result.append((d + 1, origin_row + row, origin_col + col))
+                    dists.append(d + 1)
+                    rows.append(origin_row + row)
+                    cols.append(origin_col + col)
 
-        return result
+        return (
+            np.array(dists, dtype=int),
+            np.array(rows, dtype=int),
+            np.array(cols, dtype=int),
+        )
+
+    @staticmethod
+    def _subst_mat_slack(subst_mat) -> int:
+        """Maximum amount (per aligned residue) by which an alignment score
+        can exceed the self-alignment-score based bound used for the
+        length-difference filter. This is `0` for substitution matrices where
+        each diagonal entry is non-negative and maximal in its row."""
+        mat = np.asarray(subst_mat.matrix)
+        diag = np.diagonal(mat)
+        return max(
+            0,
+            int((mat - np.minimum.outer(diag, diag)).max()),
+            int(-diag.min()),
+        )
 
-    def _self_alignment_scores(self, seqs: Sequence) -> dict:
+    def _self_alignment_scores(self, seqs: Sequence, subst_mat) -> dict:
         """Calculate self-alignments. We need them as reference values
         to turn scores into dists"""
         return np.fromiter(
             (
-                parasail.nw_scan_16(
+                parasail.nw_scan_sat(
                     s,
                     s,
                     self.gap_open,
                     self.gap_extend,
-                    parasail.Matrix(self.subst_mat),
+                    subst_mat,
                 ).score
                 for s in seqs
             ),
@@ -119,8 +119,14 @@ def adata_cdr3_2():
     return adata
 
 
-@pytest.fixture
-def adata_define_clonotypes():
+@pytest.fixture(scope="session")
+def adata_define_clonotypes_base():
+    """Build the `adata_define_clonotypes` object once per session.
+
+    Building AnnData objects dominates the fixture overhead of the heavily
+    parametrized clonotype tests. The session-scoped `*_base` fixtures are
+    built only once; the function-scoped fixtures derived from them hand a
+    fresh copy to every test, so tests may mutate them freely."""
     obs = pd.DataFrame(
         [
             ["cell1", "AAA", "ATA", "GGC", "CCC", "IGK", "IGH", "IGK", "IGH"],
@@ -148,7 +154,12 @@ def adata_define_clonotypes():
 
 
 @pytest.fixture
-def adata_define_clonotype_clusters():
+def adata_define_clonotypes(adata_define_clonotypes_base):
+    return adata_define_clonotypes_base.copy()
+
+
+@pytest.fixture(scope="session")
+def adata_define_clonotype_clusters_base():
     obs = (
         pd.DataFrame(
             [
@@ -209,6 +220,31 @@ def adata_define_clonotype_clusters():
     return adata
 
 
+@pytest.fixture
+def adata_define_clonotype_clusters(adata_define_clonotype_clusters_base):
+    return adata_define_clonotype_clusters_base.copy()
+
+
+@pytest.fixture(scope="session")
+def adata_define_clonotype_clusters_with_dist_base(
+    adata_define_clonotype_clusters_base,
+):
+    """`adata_define_clonotype_clusters` with the identity sequence distances
+    precomputed. The distances do not depend on the parameters of
+    `define_clonotype_clusters`, so they are computed only once for all
+    parametrize cases."""
+    adata = adata_define_clonotype_clusters_base.copy()
+    ir.pp.ir_dist(adata, cutoff=0, sequence="aa")
+    return adata
+
+
+@pytest.fixture
+def adata_define_clonotype_clusters_with_dist(
+    adata_define_clonotype_clusters_with_dist_base,
+):
+    return adata_define_clonotype_clusters_with_dist_base.copy()
+
+
 @pytest.fixture
 def adata_clonotype_modularity(adata_define_clonotypes):
     adata = adata_define_clonotypes
@@ -222,10 +258,10 @@ def adata_clonotype_modularity(adata_define_clonotypes):
     return adata
 
 
-@pytest.fixture
-def adata_conn(adata_define_clonotype_clusters):
+@pytest.fixture(scope="session")
+def adata_conn_base(adata_define_clonotype_clusters_base):
     """Stub adata to test the clonotype_network functions"""
-    adata = adata_define_clonotype_clusters
+    adata = adata_define_clonotype_clusters_base.copy()
     ir.pp.ir_dist(adata, sequence="aa", metric="alignment")
     ir.tl.define_clonotype_clusters(
         adata, sequence="aa", metric="alignment", receptor_arms="any", dual_ir="any"
@@ -235,7 +271,12 @@ def adata_conn(adata_define_clonotype_clusters):
 
 
 @pytest.fixture
-def adata_define_clonotype_clusters_singletons():
+def adata_conn(adata_conn_base):
+    return adata_conn_base.copy()
+
+
+@pytest.fixture(scope="session")
+def adata_define_clonotype_clusters_singletons_base():
     """Adata where every cell belongs to a singleton clonotype.
     Required for a regression test for #236.
     """
@@ -262,12 +303,29 @@ def adata_define_clonotype_clusters_singletons():
 
 
 @pytest.fixture
-def adata_clonotype_network(adata_conn):
+def adata_define_clonotype_clusters_singletons(
+    adata_define_clonotype_clusters_singletons_base,
+):
+    # The tests using this fixture only add obs columns and uns entries,
+    # so it is cheaper to drop those again than to copy the whole AnnData.
+    adata = adata_define_clonotype_clusters_singletons_base
+    obs_columns = set(adata.obs.columns)
+    uns_keys = set(adata.uns.keys())
+    yield adata
+    for col in set(adata.obs.columns) - obs_columns:
+        del adata.obs[col]
+    for key in set(adata.uns.keys()) - uns_keys:
+        del adata.uns[key]
+
+
+@pytest.fixture(scope="session")
+def adata_clonotype_network_base(adata_conn_base):
     """Adata with clonotype network computed.
 
     adata derived from adata_conn that also contains some gene expression data
     for plotting.
     """
+    adata_conn = adata_conn_base.copy()
     adata = AnnData(
         var=pd.DataFrame().assign(gene_symbol=["CD8A", "CD4"]).set_index("gene_symbol"),
         X=np.array(
@@ -286,6 +344,11 @@ def adata_clonotype_network(adata_conn):
     return adata
 
 
+@pytest.fixture
+def adata_clonotype_network(adata_clonotype_network_base):
+    return adata_clonotype_network_base.copy()
+
+
 @pytest.fixture
 def adata_tra():
     obs = {
@@ -582,8 +645,8 @@ def adata_vdj():
     return adata
 
 
-@pytest.fixture
-def adata_clonotype():
+@pytest.fixture(scope="session")
+def adata_clonotype_base():
     obs = pd.DataFrame.from_records(
         [
             ["cell1", "A", "ct1", "cc1"],
@@ -604,6 +667,11 @@ def adata_clonotype():
     return adata
 
 
+@pytest.fixture
+def adata_clonotype(adata_clonotype_base):
+    return adata_clonotype_base.copy()
+
+
 @pytest.fixture
 def adata_diversity():
     obs = pd.DataFrame.from_records(
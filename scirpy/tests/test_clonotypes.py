@@ -8,15 +8,47 @@ import numpy as np
 from scirpy.util import _is_symmetric
 from .fixtures import (
     adata_define_clonotype_clusters_singletons,
+    adata_define_clonotype_clusters_singletons_base,
     adata_define_clonotypes,
+    adata_define_clonotypes_base,
     adata_define_clonotype_clusters,
+    adata_define_clonotype_clusters_base,
+    adata_define_clonotype_clusters_with_dist,
+    adata_define_clonotype_clusters_with_dist_base,
     adata_clonotype_network,
+    adata_clonotype_network_base,
     adata_clonotype,
+    adata_clonotype_base,
     adata_conn,
+    adata_conn_base,
 )  # NOQA
-import random
 import pytest
 
+# pre-bind the dotted lookups used in the parametrized tests
+_ir_dist = ir.pp.ir_dist
+_define_clonotypes = ir.tl.define_clonotypes
+_define_clonotype_clusters = ir.tl.define_clonotype_clusters
+_clonotype_network = ir.tl.clonotype_network
+_clonotype_convergence = ir.tl.clonotype_convergence
+
+# expected values for the singleton test cases, built once at import time
+_SINGLETON_CLONOTYPES_EXPECTED = np.array(["0", "1", "2", "3"])
+_SINGLETON_CLONOTYPE_SIZES_EXPECTED = np.array([1, 1, 1, 1])
+
+# expected values for test_clonotype_convergence
+_CONVERGENCE_EXPECTED = pd.Categorical(
+    ["not convergent"] * 3
+    + ["nan"] * 2
+    + ["not convergent"]
+    + ["convergent"] * 2
+    + ["not convergent"] * 2,
+    categories=["convergent", "not convergent", "nan"],
+)
+_CONVERGENCE_EXPECTED_REVERSED = pd.Categorical(
+    ["not convergent"] * 3 + ["nan"] * 2 + ["not convergent"] * 5,
+    categories=["convergent", "not convergent", "nan"],
+)
+
 
 @pytest.mark.parametrize("key_added", [None, "my_key"])
 @pytest.mark.parametrize("inplace", [True, False])
@@ -25,7 +57,7 @@ def test_define_clonotype_clusters_return_values(
 ):
     """Test that key_added and inplace work as expected"""
     adata = adata_define_clonotype_clusters_singletons
-    res = ir.tl.define_clonotype_clusters(
+    res = _define_clonotype_clusters(
         adata,
         receptor_arms="VJ",
         dual_ir="primary_only",
@@ -36,8 +68,8 @@ def test_define_clonotype_clusters_return_values(
         key_added=key_added,
     )  # type: ignore
 
-    clonotype_expected = np.array([0, 1, 2, 3]).astype(str)
-    clonotype_size_expected = np.array([1, 1, 1, 1])
+    clonotype_expected = _SINGLETON_CLONOTYPES_EXPECTED
+    clonotype_size_expected = _SINGLETON_CLONOTYPE_SIZES_EXPECTED
 
     if inplace:
         assert res is None
@@ -60,7 +92,7 @@ def test_define_clonotypes_diagonal_connectivities(
 ):
     """Regression test for #236. Computing the clonotypes when
     no cells are connected in the clonotype neighborhood graph should not fail."""
-    clonotype, clonotype_size, _ = ir.tl.define_clonotype_clusters(
+    clonotype, clonotype_size, _ = _define_clonotype_clusters(
         adata_define_clonotype_clusters_singletons,
         receptor_arms=receptor_arms,
         dual_ir=dual_ir,
@@ -69,126 +101,140 @@ def test_define_clonotypes_diagonal_connectivities(
         same_v_gene=True,
         inplace=False,
     )  # type: ignore
-    npt.assert_equal(clonotype, np.array([0, 1, 2, 3]).astype(str))
-    npt.assert_equal(clonotype_size, np.array([1, 1, 1, 1]))
+    npt.assert_equal(clonotype, _SINGLETON_CLONOTYPES_EXPECTED)
+    npt.assert_equal(clonotype_size, _SINGLETON_CLONOTYPE_SIZES_EXPECTED)
 
 
 def test_clonotypes_end_to_end1(adata_define_clonotypes):
     """Test that default parameters of define_clonotypes yields
     clonotypes based on nt-identity."""
-    ir.pp.ir_dist(adata_define_clonotypes)
-    clonotypes, clonotype_size, _ = ir.tl.define_clonotypes(
+    _ir_dist(adata_define_clonotypes)
+    clonotypes, clonotype_size, _ = _define_clonotypes(
         adata_define_clonotypes,
         inplace=False,
         within_group=None,
         receptor_arms="all",
         dual_ir="all",
     )  # type: ignore
-    print(clonotypes)
     expected = [0, 0, 1, 2, 3]
     expected_size = [2, 2, 1, 1, 1]
     npt.assert_equal(clonotypes.values, [str(x) for x in expected])
     npt.assert_equal(clonotype_size.values, expected_size)
 
 
+def _as_float_arrays(params):
+    """Convert the expected lists of each parametrize case to float arrays
+    once at import time, rather than on every test invocation."""
+    return [
+        (
+            *case[:-2],
+            np.asarray(case[-2], dtype=float),
+            np.asarray(case[-1], dtype=float),
+        )
+        for case in params
+    ]
+
+
 @pytest.mark.parametrize(
     "receptor_arms,dual_ir,same_v_gene,within_group,expected,expected_size",
-    [
-        (
-            "all",
-            "all",
-            False,
-            None,
-            [0, 0, 1, 2, 3, np.nan, 4, 5, 6, 7, 8],
-            [2, 2, 1, 1, 1, np.nan, 1, 1, 1, 1, 1],
-        ),
-        (
-            "any",
-            "any",
-            False,
-            None,
-            [0, 0, 0, 0, 0, np.nan, 0, 0, 0, 0, 1],
-            [9, 9, 9, 9, 9, np.nan, 9, 9, 9, 9, 1],
-        ),
-        (
-            "all",
-            "any",
-            False,
-            None,
-            [0, 0, 0, 0, 0, np.nan, 0, 1, 0, 2, 3],
-            [7, 7, 7, 7, 7, np.nan, 7, 1, 7, 1, 1],
-        ),
-        (
-            "any",
-            "all",
-            False,
-            None,
-            [0, 0, 0, 0, 0, np.nan, 0, 0, 0, 0, 1],
-            [9, 9, 9, 9, 9, np.nan, 9, 9, 9, 9, 1],
-        ),
-        (
-            "all",
-            "primary_only",
-            False,
-            None,
-            [0, 0, 1, 2, 0, np.nan, 0, 3, 4, 5, 6],
-            [4, 4, 1, 1, 4, np.nan, 4, 1, 1, 1, 1],
-        ),
-        (
-            "VDJ",
-            "primary_only",
-            False,
-            None,
-            [0, 0, 0, 1, 0, np.nan, 0, 2, 3, 3, 4],
-            [5, 5, 5, 1, 5, np.nan, 5, 1, 2, 2, 1],
-        ),
-        # by receptor type
-        (
-            "any",
-            "any",
-            False,
-            "receptor_type",
-            [0, 0, 0, 1, 1, np.nan, 0, 0, 0, 1, 2],
-            [6, 6, 6, 3, 3, np.nan, 6, 6, 6, 3, 1],
-        ),
-        # different combinations with same_v_gene
-        (
-            "all",
-            "all",
-            True,
-            None,
-            [0, 1, 2, 3, 4, np.nan, 5, 6, 7, 8, 9],
-            [1, 1, 1, 1, 1, np.nan, 1, 1, 1, 1, 1],
-        ),
-        (
-            "any",
-            "any",
-            True,
-            None,
-            [0, 0, 0, 1, 0, np.nan, 0, 0, 0, 0, 2],
-            [8, 8, 8, 1, 8, np.nan, 8, 8, 8, 8, 1],
-        ),
-        (
-            "VDJ",
-            "primary_only",
-            True,
-            None,
-            [0, 0, 0, 1, 0, np.nan, 0, 2, 3, 4, 5],
-            [5, 5, 5, 1, 5, np.nan, 5, 1, 1, 1, 1],
-        ),
-        # v gene and receptor type
-        (
-            "any",
-            "any",
-            True,
-            "receptor_type",
-            [0, 0, 0, 1, 2, np.nan, 0, 0, 0, 2, 3],
-            [6, 6, 6, 1, 2, np.nan, 6, 6, 6, 2, 1],
-        ),
-    ],
+    _as_float_arrays(
+        [
+            (
+                "all",
+                "all",
+                False,
+                None,
+                [0, 0, 1, 2, 3, np.nan, 4, 5, 6, 7, 8],
+                [2, 2, 1, 1, 1, np.nan, 1, 1, 1, 1, 1],
+            ),
+            (
+                "any",
+                "any",
+                False,
+                None,
+                [0, 0, 0, 0, 0, np.nan, 0, 0, 0, 0, 1],
+                [9, 9, 9, 9, 9, np.nan, 9, 9, 9, 9, 1],
+            ),
+            (
+                "all",
+                "any",
+                False,
+                None,
+                [0, 0, 0, 0, 0, np.nan, 0, 1, 0, 2, 3],
+                [7, 7, 7, 7, 7, np.nan, 7, 1, 7, 1, 1],
+            ),
+            (
+                "any",
+                "all",
+                False,
+                None,
+                [0, 0, 0, 0, 0, np.nan, 0, 0, 0, 0, 1],
+                [9, 9, 9, 9, 9, np.nan, 9, 9, 9, 9, 1],
+            ),
+            (
+                "all",
+                "primary_only",
+                False,
+                None,
+                [0, 0, 1, 2, 0, np.nan, 0, 3, 4, 5, 6],
+                [4, 4, 1, 1, 4, np.nan, 4, 1, 1, 1, 1],
+            ),
+            (
+                "VDJ",
+                "primary_only",
+                False,
+                None,
+                [0, 0, 0, 1, 0, np.nan, 0, 2, 3, 3, 4],
+                [5, 5, 5, 1, 5, np.nan, 5, 1, 2, 2, 1],
+            ),
+            # by receptor type
+            (
+                "any",
+                "any",
+                False,
+                "receptor_type",
+                [0, 0, 0, 1, 1, np.nan, 0, 0, 0, 1, 2],
+                [6, 6, 6, 3, 3, np.nan, 6, 6, 6, 3, 1],
+            ),
+            # different combinations with same_v_gene
+            (
+                "all",
+                "all",
+                True,
+                None,
+                [0, 1, 2, 3, 4, np.nan, 5, 6, 7, 8, 9],
+                [1, 1, 1, 1, 1, np.nan, 1, 1, 1, 1, 1],
+            ),
+            (
+                "any",
+                "any",
+                True,
+                None,
+                [0, 0, 0, 1, 0, np.nan, 0, 0, 0, 0, 2],
+                [8, 8, 8, 1, 8, np.nan, 8, 8, 8, 8, 1],
+            ),
+            (
+                "VDJ",
+                "primary_only",
+                True,
+                None,
+                [0, 0, 0, 1, 0, np.nan, 0, 2, 3, 4, 5],
+                [5, 5, 5, 1, 5, np.nan, 5, 1, 1, 1, 1],
+            ),
+            # v gene and receptor type
+            (
+                "any",
+                "any",
+                True,
+                "receptor_type",
+                [0, 0, 0, 1, 2, np.nan, 0, 0, 0, 2, 3],
+                [6, 6, 6, 1, 2, np.nan, 6, 6, 6, 2, 1],
+            ),
+        ]
+    ),
 )
 def test_clonotype_clusters_end_to_end(
-    adata_define_clonotype_clusters,
+    adata_define_clonotype_clusters_with_dist,
     receptor_arms,
     dual_ir,
     same_v_gene,
@@ -197,23 +243,18 @@ def test_clonotype_clusters_end_to_end(
     expected_size,
 ):
     """Test define_clonotype_clusters with different parameters"""
-    ir.pp.ir_dist(
-        adata_define_clonotype_clusters,
-        cutoff=0,
-        sequence="aa",
-    )
-    clonotypes, clonotype_size, _ = ir.tl.define_clonotype_clusters(
-        adata_define_clonotype_clusters,
+    clonotypes, clonotype_size, _ = _define_clonotype_clusters(
+        adata_define_clonotype_clusters_with_dist,
         inplace=False,
         within_group=within_group,
         receptor_arms=receptor_arms,
         dual_ir=dual_ir,
         same_v_gene=same_v_gene,
     )  # type: ignore
-    print(clonotypes)
-    npt.assert_equal(
-        list(clonotypes.values), [str(x) if not np.isnan(x) else x for x in expected]
-    )
+    # vectorized equivalent of `str(x) if not np.isnan(x) else x`
+    expected_str = np.nan_to_num(expected).astype(int).astype(str).astype(object)
+    expected_str[np.isnan(expected)] = np.nan
+    npt.assert_equal(list(clonotypes.values), list(expected_str))
     npt.assert_almost_equal(clonotype_size.values, expected_size)
 
 
@@ -263,7 +304,7 @@ def test_clonotype_clusters_end_to_end(
 def test_clonotype_network(
     adata_conn, min_cells, min_nodes, layout, size_aware, expected
 ):
-    coords = ir.tl.clonotype_network(
+    coords = _clonotype_network(
         adata_conn,
         sequence="aa",
         metric="alignment",
@@ -271,12 +312,25 @@ def test_clonotype_network(
         min_nodes=min_nodes,
         size_aware=size_aware,
         layout=layout,
+        random_state=42,
         inplace=False,
     )
     # print(coords)
     npt.assert_almost_equal(coords.values, np.array(expected), decimal=5)
 
 
+def test_clonotype_network_size_aware_requires_components(adata_conn):
+    """`size_aware` is only compatible with the `components` layout."""
+    with pytest.raises(ValueError):
+        _clonotype_network(
+            adata_conn,
+            sequence="aa",
+            metric="alignment",
+            size_aware=True,
+            layout="fr",
+        )
+
+
 def test_clonotype_network_igraph(adata_clonotype_network):
     g, lo = ir.tl.clonotype_network_igraph(adata_clonotype_network)
     print(lo.coords)
@@ -301,13 +355,13 @@ def test_clonotype_network_igraph(adata_clonotype_network):
 
 
 def test_clonotype_convergence(adata_clonotype):
-    res = ir.tl.clonotype_convergence(
+    res = _clonotype_convergence(
         adata_clonotype,
         key_coarse="clonotype_cluster",
         key_fine="clone_id",
         inplace=False,
     )
-    ir.tl.clonotype_convergence(
+    _clonotype_convergence(
         adata_clonotype,
         key_coarse="clonotype_cluster",
         key_fine="clone_id",
@@ -315,28 +369,12 @@ def test_clonotype_convergence(adata_clonotype):
         key_added="is_convergent_",
     )
     pdt.assert_extension_array_equal(res, adata_clonotype.obs["is_convergent_"].values)
-    pdt.assert_extension_array_equal(
-        res,
-        pd.Categorical(
-            ["not convergent"] * 3
-            + ["nan"] * 2
-            + ["not convergent"]
-            + ["convergent"] * 2
-            + ["not convergent"] * 2,
-            categories=["convergent", "not convergent", "nan"],
-        ),
-    )
+    pdt.assert_extension_array_equal(res, _CONVERGENCE_EXPECTED)
 
-    res = ir.tl.clonotype_convergence(
+    res = _clonotype_convergence(
         adata_clonotype,
         key_fine="clonotype_cluster",
         key_coarse="clone_id",
         inplace=False,
     )
-    pdt.assert_extension_array_equal(
-        res,
-        pd.Categorical(
-            ["not convergent"] * 3 + ["nan"] * 2 + ["not convergent"] * 5,
-            categories=["convergent", "not convergent", "nan"],
-        ),
-    )
+    pdt.assert_extension_array_equal(res, _CONVERGENCE_EXPECTED_REVERSED)
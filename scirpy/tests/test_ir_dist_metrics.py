@@ -135,23 +135,24 @@ def test_levenshtein_compute_block():
     levenshtein1 = LevenshteinDistanceCalculator(1)
     seqs = np.array(["A", "AAA", "AA"])
     seqs2 = np.array(["AB", "BAA"])
-    b1 = list(levenshtein1._compute_block(seqs, None, (10, 20)))
-    b2 = list(levenshtein1._compute_block(seqs, seqs, (10, 20)))
-    b3 = list(levenshtein1._compute_block(seqs, seqs2, (10, 20)))
-    b4 = list(levenshtein1._compute_block(seqs2, seqs, (10, 20)))
+    b1 = levenshtein1._compute_block(seqs, None, (10, 20))
+    b2 = levenshtein1._compute_block(seqs, seqs, (10, 20))
+    b3 = levenshtein1._compute_block(seqs, seqs2, (10, 20))
+    b4 = levenshtein1._compute_block(seqs2, seqs, (10, 20))
 
-    assert b1 == [(1, 10, 20), (2, 10, 22), (1, 11, 21), (2, 11, 22), (1, 12, 22)]
-    assert b2 == [
-        (1, 10, 20),
-        (2, 10, 22),
-        (1, 11, 21),
-        (2, 11, 22),
-        (2, 12, 20),
-        (2, 12, 21),
-        (1, 12, 22),
-    ]
-    assert b3 == [(2, 10, 20), (2, 11, 21), (2, 12, 20), (2, 12, 21)]
-    assert b4 == [(2, 10, 20), (2, 10, 22), (2, 11, 21), (2, 11, 22)]
+    npt.assert_equal(
+        b1, ([1, 2, 1, 2, 1], [10, 10, 11, 11, 12], [20, 22, 21, 22, 22])
+    )
+    npt.assert_equal(
+        b2,
+        (
+            [1, 2, 1, 2, 2, 2, 1],
+            [10, 10, 11, 11, 12, 12, 12],
+            [20, 22, 21, 22, 20, 21, 22],
+        ),
+    )
+    npt.assert_equal(b3, ([2, 2, 2, 2], [10, 11, 12, 12], [20, 21, 20, 21]))
+    npt.assert_equal(b4, ([2, 2, 2, 2], [10, 10, 11, 11], [20, 22, 21, 22]))
 
 
 def test_levensthein_dist():
@@ -227,9 +228,11 @@ def test_alignment_compute_block():
     b2 = aligner10._compute_block(seqs, None, (10, 20))
     b3 = aligner10._compute_block(seqs, seqs, (10, 20))
 
-    assert b1 == [(1, 0, 0), (9, 0, 1), (39, 0, 2), (1, 1, 1), (41, 1, 2), (1, 2, 2)]
-    assert b2 == [(1, 10, 20), (9, 10, 21), (1, 11, 21), (1, 12, 22)]
-    assert b3 == [(1, 10, 20), (9, 10, 21), (9, 11, 20), (1, 11, 21), (1, 12, 22)]
+    npt.assert_equal(b1, ([1, 9, 39, 1, 41, 1], [0, 0, 0, 1, 1, 2], [0, 1, 2, 1, 2, 2]))
+    npt.assert_equal(b2, ([1, 9, 1, 1], [10, 10, 11, 12], [20, 21, 21, 22]))
+    npt.assert_equal(
+        b3, ([1, 9, 9, 1, 1], [10, 10, 11, 11, 12], [20, 21, 20, 21, 22])
+    )
 
 
 def test_alignment_dist():
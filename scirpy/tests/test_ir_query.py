@@ -11,7 +11,12 @@ import numpy as np
 import numpy.testing as npt
 import pytest
 import json
-from .fixtures import adata_cdr3, adata_cdr3_2, adata_define_clonotype_clusters
+from .fixtures import (
+    adata_cdr3,
+    adata_cdr3_2,
+    adata_define_clonotype_clusters,
+    adata_define_clonotype_clusters_base,
+)
 
 
 @pytest.mark.parametrize("metric", ["identity", "levenshtein"])
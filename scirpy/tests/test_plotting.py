@@ -4,12 +4,17 @@ from scirpy import pl
 from .fixtures import (
     adata_tra,
     adata_clonotype,
+    adata_clonotype_base,
     adata_diversity,
     adata_vdj,
     adata_conn,
+    adata_conn_base,
     adata_define_clonotype_clusters,
+    adata_define_clonotype_clusters_base,
     adata_clonotype_network,
+    adata_clonotype_network_base,
     adata_define_clonotypes,
+    adata_define_clonotypes_base,
     adata_clonotype_modularity,
 )
 import matplotlib.pyplot as plt
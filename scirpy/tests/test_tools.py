@@ -10,12 +10,16 @@ import scanpy as sc
 import itertools
 from .fixtures import (
     adata_clonotype,
+    adata_clonotype_base,
     adata_tra,
     adata_vdj,
     adata_diversity,
     adata_conn,
+    adata_conn_base,
     adata_clonotype_network,
+    adata_clonotype_network_base,
     adata_define_clonotype_clusters,
+    adata_define_clonotype_clusters_base,
 )
 
 
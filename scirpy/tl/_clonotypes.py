@@ -312,12 +312,15 @@ def define_clonotype_clusters(
         data=None, index=adata.obs_names, dtype=int
     )
 
-    # clonotype cluster = graph partition
-    idx, values = zip(
-        *itertools.chain.from_iterable(
-            zip(ctn.cell_indices[str(ct_id)], itertools.repeat(str(clonotype_cluster)))
-            for ct_id, clonotype_cluster in enumerate(part.membership)
-        )
+    # clonotype cluster = graph partition. Fan out the cluster ids to cells
+    # via flat arrays instead of looping over all cells in Python.
+    cell_indices = [
+        ctn.cell_indices[str(ct_id)] for ct_id in range(len(part.membership))
+    ]
+    idx = np.concatenate(cell_indices)
+    values = np.repeat(
+        np.array(part.membership).astype(str),
+        [x.size for x in cell_indices],
     )
     clonotype_cluster_series = pd.Series(values, index=idx).reindex(adata.obs_names)
     clonotype_cluster_size_series = clonotype_cluster_series.groupby(
@@ -569,12 +572,14 @@ def clonotype_network(
         tmp_layout_kwargs.update(layout_kwargs)
         coords = graph.layout(layout, **tmp_layout_kwargs).coords
 
-    # Expand to cell coordinates to store in adata.obsm
-    idx, coords = zip(
-        *itertools.chain.from_iterable(
-            zip(clonotype_res["cell_indices"][str(node_id)], itertools.repeat(coord))
-            for node_id, coord in zip(graph.vs["node_id"], coords)  # type: ignore
-        )
+    # Expand to cell coordinates to store in adata.obsm. Each node's
+    # coordinate is repeated for all cells mapping to that node.
+    cell_indices = [
+        clonotype_res["cell_indices"][str(node_id)] for node_id in graph.vs["node_id"]
+    ]
+    idx = np.concatenate(cell_indices)
+    coords = np.repeat(
+        np.asarray(coords), [x.size for x in cell_indices], axis=0  # type: ignore
     )
     coord_df = pd.DataFrame(data=coords, index=idx, columns=["x", "y"]).reindex(
         adata.obs_names
@@ -603,12 +608,11 @@ def _graph_from_coordinates(
     """
     clonotype_res = adata.uns[clonotype_key]
     # map the cell-id to the corresponding row/col in the clonotype distance matrix
-    dist_idx, obs_names = zip(
-        *itertools.chain.from_iterable(
-            zip(itertools.repeat(i), obs_names)
-            for i, obs_names in clonotype_res["cell_indices"].items()
-        )
+    dist_idx = np.repeat(
+        list(clonotype_res["cell_indices"].keys()),
+        [x.size for x in clonotype_res["cell_indices"].values()],
     )
+    obs_names = np.concatenate(list(clonotype_res["cell_indices"].values()))
     dist_idx_lookup = pd.DataFrame(index=obs_names, data=dist_idx, columns=["dist_idx"])
     clonotype_label_lookup = adata.obs.loc[:, [clonotype_key]].rename(
         columns={clonotype_key: "label"}